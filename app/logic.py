@@ -1,5 +1,4 @@
 
-import os
 from typing import Dict, Any, Optional, List
 import traceback
 
@@ -54,6 +53,7 @@ def get_network():
 def get_global_stats() -> Dict[str, Any]:
     """Calculate and return global statistics about the network."""
     current_network = _get_network_instance()
+    current_network.ensure_metrics()
     nodes = current_network.nodes
     total_nodes = len(nodes)
     total_edges = sum(len(edges) for edges in current_network.graph.values())
@@ -138,18 +138,19 @@ def bulk_remove_nodes(node_ids: List[str]):
 
     # Proceed with deletion if all checks passed
     try:
-        for node_id in node_ids:
-            try:
-                # We already validated, but model's remove_node does final checks
-                current_network.remove_node(node_id)
-                deleted_count += 1
-            except ValueError as ve_inner:
-                 # Should ideally not happen due to pre-check, but catch just in case
-                 failed_nodes[node_id] = str(ve_inner)
-                 print(f"Error deleting node '{node_id}' during bulk operation (post-check): {ve_inner}")
-            except Exception as e_inner:
-                 failed_nodes[node_id] = "Unexpected server error during deletion"
-                 print(f"Unexpected error deleting node '{node_id}' during bulk operation: {e_inner}\n{traceback.format_exc()}")
+        with current_network.bulk_update(): # One metrics pass for the whole batch
+            for node_id in node_ids:
+                try:
+                    # We already validated, but model's remove_node does final checks
+                    current_network.remove_node(node_id)
+                    deleted_count += 1
+                except ValueError as ve_inner:
+                     # Should ideally not happen due to pre-check, but catch just in case
+                     failed_nodes[node_id] = str(ve_inner)
+                     print(f"Error deleting node '{node_id}' during bulk operation (post-check): {ve_inner}")
+                except Exception as e_inner:
+                     failed_nodes[node_id] = "Unexpected server error during deletion"
+                     print(f"Unexpected error deleting node '{node_id}' during bulk operation: {e_inner}\n{traceback.format_exc()}")
 
         # Save only if at least one node was successfully deleted (or attempted)
         if deleted_count > 0 or failed_nodes: # Save even if some failed to persist successful deletions
@@ -276,16 +277,8 @@ def update_settings(data: Dict[str, Any]):
         return {"error": f"An unexpected server error occurred while updating settings."}
 
 
-def reload_network_from_file(filepath: str):
-    """Forces reload of the global network instance from the specified file."""
+def replace_network(new_network: BusinessNetwork):
+    """Installs an already-built network (e.g. validated by an import) as the global instance."""
     global network
-    try:
-        # Use the filename part to load relative to the data directory
-        network = BusinessNetwork.load(filename=os.path.basename(filepath))
-        print(f"Network reloaded successfully from {filepath}")
-        return True
-    except Exception as e:
-        print(f"Error reloading network from {filepath}: {e}")
-        # Attempt to re-initialize to prevent None state
-        initialize_network()
-        return False
\ No newline at end of file
+    network = new_network
+    print("Network replaced with imported instance.")
@@ -14,11 +14,11 @@ import shutil # For secure file saving
 # Assuming 'app' directory is in the python path or use relative import if running as module
 try:
     # Adjusted imports assuming standard structure
-    from app.network_model import BusinessNetwork
+    from app.network_model import BusinessNetwork, json_loads, json_dumps
     import app.logic as logic
 except ImportError:
      # Fallback for running main.py directly from project root for development
-    from network_model import BusinessNetwork
+    from network_model import BusinessNetwork, json_loads, json_dumps
     import logic # type: ignore
 
 app = FastAPI(
@@ -140,7 +140,7 @@ async def api_add_subtree(parent_id: str, file: UploadFile = File(..., descripti
         contents = await file.read()
         # Basic JSON validation
         try:
-            subtree_data = json.loads(contents)
+            subtree_data = json_loads(contents) # orjson when installed; its errors subclass JSONDecodeError
             if not isinstance(subtree_data, dict) or "nodes" not in subtree_data or "graph" not in subtree_data:
                  raise ValueError("Invalid subtree JSON structure. Must contain 'nodes' and 'graph'.")
         except json.JSONDecodeError as e:
@@ -230,12 +230,9 @@ async def import_network(file: UploadFile = File(..., description="A JSON file r
         # Replace the original file with the temporary file
         shutil.move(temp_filepath, import_filepath)
 
-        # Reload the global network instance from the new file
-        if logic.reload_network_from_file(import_filepath):
-             return {"success": True, "message": "Network imported successfully."}
-        else:
-             # This indicates an error during reload AFTER successful file save/move
-             raise HTTPException(status_code=500, detail="Network file saved but failed to reload into application.")
+        # Install the already-validated instance instead of re-parsing the file we just wrote
+        logic.replace_network(temp_network)
+        return {"success": True, "message": "Network imported successfully."}
 
     except HTTPException:
         raise # Re-raise HTTP exceptions directly
@@ -277,9 +274,9 @@ def export_network(background_tasks: BackgroundTasks): # Inject BackgroundTasks
         # Remove global stats before exporting if they were added
         network_data.pop("global_stats", None)
 
-        # Save network data to the export file
-        with open(temp_export_path, 'w') as f:
-            json.dump(network_data, f, indent=2)
+        # Save network data to the export file (pretty-printed; orjson when installed)
+        with open(temp_export_path, 'wb') as f:
+            f.write(json_dumps(network_data, indent=True))
 
         # Add background task to remove the file after response is sent
         background_tasks.add_task(remove_file, temp_export_path)
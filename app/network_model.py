@@ -1,15 +1,63 @@
 
 from collections import defaultdict, deque
-from typing import Dict, List, Tuple, Optional, Set, Any, Union
-import uuid
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional, Set, FrozenSet, Any, Union, Iterator
 import math
 import os
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 import shutil
 import traceback
 import copy # For deep copying subtree data
 
+# Path resolved once at import rather than on every save/load/instance creation; save() creates the directory
+_SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+_DATA_DIR = os.path.join(os.path.dirname(_SCRIPT_DIR), "data")
+
+try:
+    import orjson # Optional: much faster JSON encode/decode for large networks
+except ImportError:
+    orjson = None
+
+def json_loads(raw: Union[str, bytes]) -> Any:
+    """Decodes JSON with orjson when installed, otherwise the stdlib decoder."""
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass # orjson rejects the NaN/Infinity literals the stdlib encoder writes; the stdlib decoder accepts them
+    return json.loads(raw)
+
+def json_dumps(data: Any, indent: bool = False) -> bytes:
+    """Encodes JSON as UTF-8 bytes (compact unless indent=True) with orjson when installed, otherwise the stdlib encoder."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    if indent:
+        return json.dumps(data, indent=2).encode("utf-8")
+    return json.dumps(data, separators=(",", ":")).encode("utf-8")
+
+def _normalize_node(node_id: str, node_data: Dict[str, Any], node_defaults: Dict[str, Any], min_children: int) -> Dict[str, Any]:
+    """Normalizes one loaded node: drops obsolete fields, merges defaults and coerces 'value' to float."""
+    # Remove obsolete fields if present from older files
+    node_data.pop("risk", None)
+    node_data.pop("ponzi_value", None)
+    node_data.pop("balance_score", None)
+
+    node = {**node_defaults, "id": node_id, **node_data}
+    if node["suggested_child_count"] is None:
+        node["suggested_child_count"] = min_children
+
+    value = node["value"]
+    try:
+        if type(value) is not float:
+            value = node["value"] = float(value)
+        if not math.isfinite(value): # NaN/inf would not survive a save: orjson writes them as null
+            raise ValueError(value)
+    except (ValueError, TypeError):
+        print(f"Warning: Invalid value format for node '{node_id}'. Using default.")
+        node["value"] = node_defaults["value"]
+    return node
+
 class BusinessNetwork:
     """
     Represents the business network with nodes, edges, and calculated metrics.
@@ -20,16 +68,45 @@ class BusinessNetwork:
     Added subtree import functionality.
     """
     DEFAULT_NODE_VALUE = 1000.0
+    DEFAULT_EDGE_CAPACITY = 1.0
+    # Backups of the previous file are taken on the first save, then periodically (not on every save)
+    BACKUP_EVERY_N_SAVES = 10
+    BACKUP_MAX_AGE = timedelta(hours=1)
+    BACKUP_KEEP = 3 # Older '<name>_backup_*.json' files are deleted when a new backup is taken
+    # Compact saves are streamed entry by entry; buffered chunks are written out every N entries
+    SAVE_FLUSH_EVERY_N_ENTRIES = 1000
+    # Defaults merged into every node on load/import and copied for new nodes (_new_node).
+    # 'suggested_child_count' is patched from the network threshold after merging. Tuple avoids a shared mutable default.
+    _NODE_DEFAULTS: Dict[str, Any] = {
+        "parents": (), "value": DEFAULT_NODE_VALUE,
+        "depth": 0, "children_count": 0, "total_children": 0, "profit": 0.0,
+        "is_chokepoint": False, "suggested_child_count": None,
+        "needed_children": 0, "criticality": 0.0,
+    }
 
     def __init__(self, min_children_threshold: int = 2):
-        self.graph: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        self.graph: Dict[str, List[str]] = defaultdict(list) # node_id -> child ids
+        self.capacities: Dict[Tuple[str, str], float] = {} # (parent, child) -> capacity, only when not DEFAULT_EDGE_CAPACITY
         self.nodes: Dict[str, Dict[str, Any]] = {}
-        self.min_children_threshold: int = max(1, min_children_threshold) # Balance factor removed
+        self.min_children_threshold = min_children_threshold # Clamped by the property setter; balance factor removed
         self.max_depth: int = 0
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(script_dir)
-        self.data_dir = os.path.join(project_root, "data")
-        os.makedirs(self.data_dir, exist_ok=True)
+        self._depth_counts: Dict[int, int] = {} # depth -> number of nodes at that depth; keeps max_depth O(1) on leaf removal
+        self._child_value_sums: Dict[str, float] = {} # node_id -> unrounded sum of children's values; 'profit' is derived from it
+        self._metrics_dirty: bool = False # True when metrics are stale and must be recomputed before reads
+        self._descendants_cache: Dict[str, FrozenSet[str]] = {} # node_id -> descendants; cleared on every structural change
+        self._child_counter: Dict[str, int] = {} # parent_id -> last auto-generated child sequence number
+        self._saves_since_backup: int = 0
+        self._last_backup_time: Optional[datetime] = None
+        self.data_dir = _DATA_DIR
+
+    @property
+    def min_children_threshold(self) -> int:
+        return self._min_children_threshold
+
+    @min_children_threshold.setter
+    def min_children_threshold(self, value: int) -> None:
+        """Clamps once on assignment (int, at least 1) so metric code can use the value as-is."""
+        self._min_children_threshold = max(1, int(value))
 
     def _generate_unique_id(self, base_id: str) -> str:
         """Generates a unique ID based on base_id, adding suffix if needed."""
@@ -60,9 +137,11 @@ class BusinessNetwork:
             if is_root_node:
                 final_id = "root"
             else:
-                 # Generate ID based on parent and number of siblings already present
-                 base_id = f"{parent_id}.{len(self.graph.get(parent_id, [])) + 1}"
-                 final_id = self._generate_unique_id(base_id)
+                 # Generate ID from a per-parent sequence that never goes backwards after removals,
+                 # so the first candidate is normally free and the collision loop does not run
+                 seq = max(self._child_counter.get(parent_id, 0), len(self.graph.get(parent_id, []))) + 1
+                 self._child_counter[parent_id] = seq
+                 final_id = self._generate_unique_id(f"{parent_id}.{seq}")
         else:
             final_id = self._generate_unique_id(str(node_id))
             if final_id != str(node_id):
@@ -72,32 +151,36 @@ class BusinessNetwork:
         try:
             raw_value = kwargs.get('value')
             node_value = self.DEFAULT_NODE_VALUE if raw_value is None or raw_value == '' else float(raw_value)
+            if not math.isfinite(node_value): raise ValueError(node_value) # NaN/inf cannot be saved as JSON numbers
         except (ValueError, TypeError):
-             raise ValueError("Invalid format for 'value' property. Must be a number.")
-
-        self.nodes[final_id] = {
-            "id": final_id,
-            "parents": [],
-            "value": node_value,
-            "depth": 0, "children_count": 0, "total_children": 0,
-            "is_chokepoint": False, "suggested_child_count": self.min_children_threshold,
-            "needed_children": 0, "profit": 0.0, "criticality": 0.0,
-            # Balance score removed
-            **{k: v for k, v in kwargs.items() if k not in ['value', 'balance_score']} # Ensure balance_score is not added
-        }
+             raise ValueError("Invalid format for 'value' property. Must be a finite number.")
+
+        self.nodes[final_id] = self._new_node(final_id, node_value,
+                                              {k: v for k, v in kwargs.items() if k not in ['value', 'balance_score']}) # Ensure balance_score is not added
         if final_id not in self.graph:
             self.graph[final_id] = []
+        self._descendants_cache.clear()
 
         # Connect to parent
         if parent_id is not None:
-            capacity = 1.0 # Default capacity
             if parent_id not in self.graph: self.graph[parent_id] = []
-            self.graph[parent_id].append((final_id, capacity))
+            self.graph[parent_id].append(final_id) # Default capacity, nothing stored in self.capacities
             self.nodes[final_id]["parents"].append(parent_id)
 
-        self._update_metrics()
+        if not self._metrics_dirty: # Deferred metrics are recomputed in full on the next read
+            self._update_metrics_for_added_leaf(final_id)
         return final_id
 
+    def _new_node(self, node_id: str, value: float, properties: Dict[str, Any]) -> Dict[str, Any]:
+        """Builds a fresh node dict from the _NODE_DEFAULTS template (C-level copy) plus custom properties."""
+        node = self._NODE_DEFAULTS.copy()
+        node["id"] = node_id
+        node["parents"] = [] # Fresh list per node; the template holds an immutable tuple
+        node["value"] = value
+        node["suggested_child_count"] = self.min_children_threshold
+        if properties: node.update(properties)
+        return node
+
     def remove_node(self, node_id: str) -> bool:
         """Removes a leaf node."""
         if node_id not in self.nodes:
@@ -105,16 +188,29 @@ class BusinessNetwork:
         if node_id in self.graph and self.graph[node_id]:
             raise ValueError("Cannot remove node with children. Remove children first.")
 
+        self._descendants_cache.clear()
         parent_ids = self.nodes[node_id].get("parents", [])
+        incremental = not self._metrics_dirty # Deferred metrics (e.g. inside bulk_update) skip the ancestor walk
+        if incremental:
+            ancestor_ids = self._get_all_ancestors(node_id) # Collect before the node is unlinked
+            removed_depth = self.nodes[node_id].get("depth", 0)
+        unlinked_parent_ids = []
         for parent_id in parent_ids:
             if parent_id in self.graph:
-                self.graph[parent_id] = [(child, cap) for child, cap in self.graph[parent_id] if child != node_id]
+                try:
+                    self.graph[parent_id].remove(node_id) # In place; edges are unique per (parent, child)
+                    unlinked_parent_ids.append(parent_id)
+                except ValueError: pass # Stale parent link without an edge
+            self.capacities.pop((parent_id, node_id), None)
 
         del self.nodes[node_id]
+        self._child_counter.pop(node_id, None)
+        self._child_value_sums.pop(node_id, None)
         if node_id in self.graph:
              del self.graph[node_id] # Remove entry from graph dict if exists
 
-        self._update_metrics()
+        if incremental: # Deferred metrics are recomputed in full on the next read
+            self._update_metrics_for_removed_leaf(unlinked_parent_ids, ancestor_ids, removed_depth)
         return True
 
     # --- NEW: Add Subtree Functionality ---
@@ -150,6 +246,7 @@ class BusinessNetwork:
         # Simple prefix based on parent ID and current time/randomness
         prefix = f"{parent_id}_sub{datetime.now().strftime('%H%M%S%f')[-8:]}_"
 
+        self._descendants_cache.clear()
         id_mapping = {} # Map original subtree ID -> new prefixed ID in the main network
         added_node_ids = []
 
@@ -171,31 +268,24 @@ class BusinessNetwork:
             try:
                  raw_value = node_data.get('value')
                  node_value = self.DEFAULT_NODE_VALUE if raw_value is None or raw_value == '' else float(raw_value)
+                 if not math.isfinite(node_value): raise ValueError(node_value) # NaN/inf cannot be saved as JSON numbers
             except (ValueError, TypeError):
                  node_value = self.DEFAULT_NODE_VALUE
                  print(f"Warning: Invalid value for imported node '{original_id}'. Using default.")
 
             # Add the node to the main network
-            self.nodes[new_id] = {
-                "id": new_id,
-                "parents": [], # Parents will be updated below
-                "value": node_value,
-                "depth": 0, "children_count": 0, "total_children": 0,
-                "is_chokepoint": False, "suggested_child_count": self.min_children_threshold,
-                "needed_children": 0, "profit": 0.0, "criticality": 0.0,
-                 # Add other properties from import, excluding calculated/internal ones
-                 **{k: v for k, v in node_data.items() if k not in [
-                     'id', 'parents', 'value', 'depth', 'children_count', 'total_children',
-                     'profit', 'criticality', 'is_chokepoint', 'needed_children',
-                     'suggested_child_count', 'balance_score', 'risk', 'ponzi_value'
-                 ]}
-            }
+            # Parents are linked below; other properties from the import are kept, excluding calculated/internal ones
+            self.nodes[new_id] = self._new_node(new_id, node_value, {k: v for k, v in node_data.items() if k not in [
+                'id', 'parents', 'value', 'depth', 'children_count', 'total_children',
+                'profit', 'criticality', 'is_chokepoint', 'needed_children',
+                'suggested_child_count', 'balance_score', 'risk', 'ponzi_value'
+            ]})
             if new_id not in self.graph: self.graph[new_id] = []
             added_node_ids.append(new_id)
 
             # Connect to the main parent if it's a root of the subtree
             if original_id in subtree_roots:
-                self.graph[parent_id].append((new_id, 1.0)) # Connect to main parent
+                self.graph[parent_id].append(new_id) # Connect to main parent with default capacity
                 self.nodes[new_id]["parents"].append(parent_id)
 
             # Process children within the subtree
@@ -213,11 +303,12 @@ class BusinessNetwork:
                  for original_target, capacity in subtree_graph_data[original_src]:
                      if original_target in id_mapping: # Check if target was added
                          new_target = id_mapping[original_target]
-                         # Add edge in main graph
-                         if new_src not in self.graph: self.graph[new_src] = []
-                         self.graph[new_src].append((new_target, float(capacity if capacity is not None else 1.0)))
-                         # Add parent link in main nodes structure
+                         # Add edge and parent link once per (source, target) pair; duplicate entries are ignored
                          if new_target in self.nodes and new_src not in self.nodes[new_target]["parents"]:
+                              if new_src not in self.graph: self.graph[new_src] = []
+                              self.graph[new_src].append(new_target)
+                              capacity = self._parse_capacity(capacity)
+                              if capacity != self.DEFAULT_EDGE_CAPACITY: self.capacities[(new_src, new_target)] = capacity
                               self.nodes[new_target]["parents"].append(new_src)
 
         if len(processed_in_subtree) != len(subtree_node_ids):
@@ -226,131 +317,190 @@ class BusinessNetwork:
         self._update_metrics() # Update metrics for the whole network
         return added_node_ids
 
+    @classmethod
+    def _parse_capacity(cls, raw: Any) -> float:
+        """Coerce an edge capacity to float, defaulting to DEFAULT_EDGE_CAPACITY. Floats (the common case) skip the try/except."""
+        if type(raw) is float:
+            return raw
+        try:
+            return float(raw)
+        except (ValueError, TypeError):
+            return cls.DEFAULT_EDGE_CAPACITY
+
+    def ensure_metrics(self) -> None:
+        """
+        Recompute metrics if they were deferred (e.g. after from_json or inside bulk_update).
+        Call before reading .nodes or .max_depth directly; get_node/get_network_data already do.
+        """
+        if self._metrics_dirty:
+            self._update_metrics()
+
+    @contextmanager
+    def bulk_update(self) -> Iterator['BusinessNetwork']:
+        """
+        Batches structural changes: per-call incremental metric updates are skipped inside the block
+        and one full pass runs on exit instead of one update per add/remove.
+        """
+        self._metrics_dirty = True
+        try:
+            yield self
+        finally:
+            self.ensure_metrics()
+
     def get_node(self, node_id: str) -> Optional[Dict[str, Any]]:
+        self.ensure_metrics()
         return self.nodes.get(node_id)
 
     def get_direct_children(self, node_id: str) -> List[str]:
-        return [child_id for child_id, _ in self.graph.get(node_id, [])]
-
-    def get_all_descendants(self, node_id: str) -> Set[str]:
+        """Returns the stored child list itself (no copy); callers must not mutate it."""
+        return self.graph.get(node_id, [])
+
+    def get_all_descendants(self, node_id: str) -> FrozenSet[str]:
+        """Returns all distinct descendants, memoized until the next structural change."""
+        cached = self._descendants_cache.get(node_id)
+        if cached is None:
+            cached = self._descendants_cache[node_id] = frozenset(self._collect_descendants(node_id))
+        return cached
+
+    def _collect_descendants(self, node_id: str) -> Set[str]:
+        """Uncached descendant walk; used directly by the metrics pass so it does not fill the cache."""
         if node_id not in self.nodes: return set()
+        # Iterative DFS; edges only ever point at existing nodes (_build_graph / add / remove keep it so)
+        graph = self.graph
         descendants = set()
-        queue = deque(self.get_direct_children(node_id))
-        while queue:
-            current_node_id = queue.popleft()
-            if current_node_id in self.nodes and current_node_id not in descendants:
-                descendants.add(current_node_id)
-                for child_id in self.get_direct_children(current_node_id):
-                    if child_id not in descendants:
-                        queue.append(child_id)
+        add_descendant = descendants.add
+        stack = [node_id]
+        pop, push = stack.pop, stack.append
+        while stack:
+            for child_id in graph.get(pop(), ()):
+                if child_id not in descendants:
+                    add_descendant(child_id)
+                    push(child_id)
         return descendants
 
     def get_network_data(self) -> Dict[str, Any]:
         """Get network data including nodes, graph, and settings."""
+        self.ensure_metrics()
         settings = {
             "min_children_threshold": self.min_children_threshold,
             # "balance_factor": self.balance_factor, # Removed
             "max_depth": self.max_depth
         }
-        # Ensure graph is serializable (list of tuples)
-        serializable_graph = {node_id: list(edges) for node_id, edges in self.graph.items()}
+        # Serialize edges in the [child, capacity] pair format used by the API, frontend and files
+        capacities = self.capacities
+        default_capacity = self.DEFAULT_EDGE_CAPACITY
+        serializable_graph = {
+            node_id: [(child_id, capacities.get((node_id, child_id), default_capacity)) for child_id in children]
+            for node_id, children in self.graph.items()
+        }
         return {"nodes": self.nodes, "graph": serializable_graph, "settings": settings}
 
     # --- Metric Calculation Methods ---
 
-    def _calculate_depth(self, node_id: str, visited: Set[str]) -> int:
-        """Calculates depth topologically or recursively. Helper for _update_metrics."""
-        if node_id not in self.nodes: return 0 # Should not happen if called from _update_metrics
-        # Base case: root nodes (or nodes whose parents aren't in self.nodes yet during calculation)
-        parents = self.nodes[node_id].get("parents", [])
-        valid_parents = [p for p in parents if p in self.nodes] # Check parents exist
-
-        if not valid_parents:
-             return 0
-
-        # Avoid infinite recursion in case of cycles during calculation
-        if node_id in visited:
-            print(f"Warning: Cycle detected involving node '{node_id}' during depth calculation. Assigning large depth.")
-            return len(self.nodes) + 1 # Assign a large depth to indicate cycle
-
-        visited.add(node_id)
-        max_parent_depth = -1
-        for parent_id in valid_parents:
-            # Recursively find depth of parents
-            # Use node's stored depth if already calculated in this update cycle, otherwise recurse
-            parent_depth = self.nodes[parent_id].get('_current_depth_calculation') # Temp storage during update
-            if parent_depth is None:
-                parent_depth = self._calculate_depth(parent_id, visited)
-
-            max_parent_depth = max(max_parent_depth, parent_depth)
-
-        visited.remove(node_id) # Backtrack: remove current node from visited path
-
-        # Depth is 1 + max depth of parents
-        depth = max_parent_depth + 1 if max_parent_depth >= 0 else 0
-        self.nodes[node_id]['_current_depth_calculation'] = depth # Store temporarily
-        return depth
-
-
-    def _calculate_total_children(self, node_id: str) -> int:
-        """Calculate the total number of descendants (direct and indirect)."""
-        return len(self.get_all_descendants(node_id))
-
-    def _calculate_profit(self, node_id: str) -> float:
-        """Calculate profit as the sum of the 'value' of direct children."""
-        profit = 0.0
-        if node_id not in self.nodes: return 0.0
-
-        child_ids = self.get_direct_children(node_id)
-        for child_id in child_ids:
-            child_node = self.nodes.get(child_id)
-            if child_node:
-                profit += child_node.get("value", 0.0) # Sum up children's base value
-
-        return round(max(0.0, profit), 2)
+    # REMOVED: _calculate_balance_score
 
+    def _get_all_ancestors(self, node_id: str) -> Set[str]:
+        """Returns all distinct ancestors of a node by walking 'parents' links."""
+        ancestors = set()
+        queue = deque(self.nodes[node_id].get("parents", []))
+        while queue:
+            parent_id = queue.popleft()
+            if parent_id not in ancestors and parent_id in self.nodes:
+                ancestors.add(parent_id)
+                queue.extend(self.nodes[parent_id].get("parents", []))
+        return ancestors
 
-    def _calculate_criticality(self, node_id: str) -> float:
+    def _recompute_node_metrics(self, node_id: str, profit: Optional[float] = None) -> None:
         """
-        Calculate criticality based on how many children are needed compared to the threshold.
-        A score between 0 (not critical) and 1 (highly critical).
-        Based on needed children and depth (deeper nodes are slightly less critical for the same need).
+        Recomputes the metrics of one node that depend on its direct children and depth
+        (children_count, profit, suggested/needed children, chokepoint flag, criticality).
+        'profit' may be passed in by callers that already walked the children; the unrounded sum is
+        kept in _child_value_sums so incremental updates can apply deltas.
         """
-        node = self.nodes.get(node_id)
-        if not node: return 0.0
-
-        children_count = node.get("children_count", 0)
-        needed_children = max(0, self.min_children_threshold - children_count)
-
-        if needed_children <= 0:
-            return 0.0 # Not critical if threshold is met or exceeded
-
-        # Normalize needed children based on threshold (0 to 1 range)
-        # If threshold is 2 and node has 0 children, need_ratio = 2/2 = 1.0
-        # If threshold is 2 and node has 1 child, need_ratio = 1/2 = 0.5
-        need_ratio = min(1.0, needed_children / max(1, self.min_children_threshold))
-
-        # Factor in depth: deeper nodes are slightly less critical for the same need_ratio
-        depth = node.get("depth", 0)
-        # Depth factor decreases criticality slightly as depth increases
-        # Example: depth 0 -> factor 1.0, depth 5 -> factor ~0.83, depth 10 -> ~0.7
-        depth_factor = 1 / (1 + 0.04 * depth) # Adjust the 0.04 to tune depth influence
-
-        criticality = need_ratio * depth_factor
-
-        # Ensure criticality is between 0 and 1
-        return round(max(0.0, min(1.0, criticality)), 3)
-
-
-    def _calculate_suggested_child_count(self, node_id: str) -> int:
-        """Calculate the suggested number of children needed based on threshold (simplified)."""
-        # Now simply returns the threshold, as specific depth logic was less critical
-        return self.min_children_threshold
-
-    # REMOVED: _calculate_balance_score
+        nodes = self.nodes
+        node = nodes[node_id]
+        children = self.graph.get(node_id, ()) # Direct read; no method call or list allocation
+        children_count = len(children)
+
+        if profit is None:
+            # Profit is the sum of the 'value' of direct children
+            profit = 0.0
+            for child_id in children:
+                child_node = nodes.get(child_id)
+                if child_node:
+                    profit += child_node.get("value", 0.0)
+        self._child_value_sums[node_id] = profit
+        self._apply_child_metrics(node, children_count, profit)
+
+    def _apply_child_metrics(self, node: Dict[str, Any], children_count: int, profit: float) -> None:
+        """Writes the child-derived fields of a node from its children count and unrounded children's value sum."""
+        # Suggested count is simply the threshold at every depth (depth-specific logic was dropped)
+        suggested = self.min_children_threshold
+        needed = max(0, suggested - children_count)
+
+        # Criticality: 0 (not critical) to 1 (highly critical), only non-zero for chokepoints.
+        # need_ratio normalizes the missing children by the threshold (threshold 2: 0 children -> 1.0, 1 child -> 0.5);
+        # the depth factor makes deeper nodes slightly less critical (depth 0 -> 1.0, 5 -> ~0.83, 10 -> ~0.7).
+        criticality = 0.0
+        if needed > 0:
+            need_ratio = min(1.0, needed / suggested)
+            depth_factor = 1 / (1 + 0.04 * node.get("depth", 0)) # Adjust the 0.04 to tune depth influence
+            criticality = round(max(0.0, min(1.0, need_ratio * depth_factor)), 3)
+
+        node["children_count"] = children_count
+        node["profit"] = round(max(0.0, profit), 2)
+        node["suggested_child_count"] = suggested
+        node["needed_children"] = needed
+        node["is_chokepoint"] = needed > 0 # Chokepoint if children needed
+        node["criticality"] = criticality
+
+    def _update_metrics_for_added_leaf(self, node_id: str) -> None:
+        """Incrementally updates metrics after a leaf is linked: O(ancestors) instead of a full pass."""
+        node = self.nodes[node_id]
+        parent_ids = [p for p in node["parents"] if p in self.nodes]
+        node["depth"] = max((self.nodes[p].get("depth", 0) for p in parent_ids), default=-1) + 1
+        self.max_depth = max(self.max_depth, node["depth"])
+        self._depth_counts[node["depth"]] = self._depth_counts.get(node["depth"], 0) + 1
+        node["total_children"] = 0
+        self._recompute_node_metrics(node_id)
+
+        # Parents change by exactly one child: apply deltas instead of re-walking all their children
+        value = node.get("value", 0.0)
+        nodes, value_sums = self.nodes, self._child_value_sums
+        for parent_id in parent_ids:
+            parent = nodes[parent_id]
+            profit = value_sums.get(parent_id, 0.0) + value
+            value_sums[parent_id] = profit
+            self._apply_child_metrics(parent, parent["children_count"] + 1, profit)
+        for ancestor_id in self._get_all_ancestors(node_id):
+            self.nodes[ancestor_id]["total_children"] += 1 # The new leaf is one more distinct descendant
+
+    def _update_metrics_for_removed_leaf(self, parent_ids: List[str], ancestor_ids: Set[str], removed_depth: int) -> None:
+        """
+        Incrementally updates metrics after a leaf was removed (counterpart of _update_metrics_for_added_leaf).
+        parent_ids are the parents whose edge to the leaf was actually removed.
+        """
+        for parent_id in parent_ids:
+            if parent_id in self.nodes:
+                # Re-sum the remaining children rather than subtracting: a running float sum loses precision
+                # (e.g. 1e16 + 1.0 - 1e16 == 0.0). remove_node already pays O(fan-out) for list.remove.
+                self._recompute_node_metrics(parent_id)
+        for ancestor_id in ancestor_ids:
+            self.nodes[ancestor_id]["total_children"] -= 1
+        depth_counts = self._depth_counts
+        remaining = depth_counts.get(removed_depth, 0) - 1
+        if remaining > 0:
+            depth_counts[removed_depth] = remaining
+        else:
+            depth_counts.pop(removed_depth, None)
+        if removed_depth >= self.max_depth: # Removed node may have been the deepest one
+            max_depth = self.max_depth
+            while max_depth > 0 and max_depth not in depth_counts: max_depth -= 1 # Walk down to the deepest occupied level
+            self.max_depth = max_depth
 
     def get_unbalanced_nodes(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Get nodes needing children, prioritized by criticality and then depth."""
+        self.ensure_metrics()
         candidates = []
         for node_id, node_data in self.nodes.items():
              criticality = node_data.get("criticality", 0.0)
@@ -377,44 +527,66 @@ class BusinessNetwork:
         candidates.sort(key=lambda x: x["priority"], reverse=True)
         return candidates[:limit]
 
+    def _is_forest(self) -> bool:
+        """True if every node has at most one incoming edge and its 'parents' list mirrors it."""
+        seen_children = set()
+        for parent_id, children in self.graph.items():
+            for child_id in children:
+                child = self.nodes.get(child_id)
+                if child_id in seen_children or child is None or child["parents"] != [parent_id]:
+                    return False
+                seen_children.add(child_id)
+        return True
+
     def _update_metrics(self) -> None:
         """Update all calculated metrics for all nodes."""
         if not self.nodes:
              self.max_depth = 0
+             self._depth_counts = {}
+             self._child_value_sums = {}
+             self._metrics_dirty = False
              return # No nodes to update
 
+        # Bind hot attributes to locals once; the loops below run per node/edge
+        nodes = self.nodes
+        graph = self.graph
+        recompute_node_metrics = self._recompute_node_metrics
+
         # --- Depth Calculation (using Topological Sort approach) ---
-        self.max_depth = 0
+        max_depth = 0
+        depth_counts = {} # depth -> number of nodes, reused by incremental removals
         nodes_to_process = deque()
-        in_degree = {nid: 0 for nid in self.nodes}
-        processed_nodes = set()
+        in_degree = dict.fromkeys(nodes, 0) # Pre-sized in C; values are overwritten below
+        topo_order = [] # Nodes in processing order (parents before children); its length is the processed count
         node_depths = {} # Store calculated depths {node_id: depth}
 
         # Initialize in-degrees and find initial nodes (roots)
-        for node_id in self.nodes:
-            valid_parents = [p for p in self.nodes[node_id].get("parents", []) if p in self.nodes]
-            self.nodes[node_id]["parents"] = valid_parents # Clean up parent list
-            in_degree[node_id] = len(valid_parents)
-            if in_degree[node_id] == 0:
+        # 'parents' is validated once at ingest (_build_graph) and kept valid by add/remove, so trust it here
+        for node_id, node in nodes.items():
+            parent_count = len(node["parents"])
+            in_degree[node_id] = parent_count
+            if not parent_count:
                 nodes_to_process.append(node_id)
                 node_depths[node_id] = 0 # Root nodes have depth 0
 
         # Process nodes layer by layer
         while nodes_to_process:
+            # A node is enqueued only when its in-degree hits exactly 0 (edges are de-duplicated), so never twice
             node_id = nodes_to_process.popleft()
-            if node_id in processed_nodes: continue # Should not happen with DAG but safety check
-            processed_nodes.add(node_id)
+            topo_order.append(node_id)
 
             current_depth = node_depths.get(node_id, 0)
-            self.nodes[node_id]["depth"] = current_depth
-            self.max_depth = max(self.max_depth, current_depth)
+            nodes[node_id]["depth"] = current_depth
+            depth_counts[current_depth] = depth_counts.get(current_depth, 0) + 1
+            if current_depth > max_depth: max_depth = current_depth
 
             # Update children's in-degree and depth
-            for child_id in self.get_direct_children(node_id):
+            child_depth = current_depth + 1
+            for child_id in graph.get(node_id, ()):
                 if child_id in in_degree: # Ensure child exists in the network
                     in_degree[child_id] -= 1
                     # Depth of child is max(its current calculated depth, parent_depth + 1)
-                    node_depths[child_id] = max(node_depths.get(child_id, 0), current_depth + 1)
+                    if node_depths.get(child_id, 0) < child_depth: node_depths[child_id] = child_depth
                     if in_degree[child_id] == 0:
                         nodes_to_process.append(child_id)
                 # else: # This case should ideally not happen if graph/nodes are consistent
@@ -422,70 +594,116 @@ class BusinessNetwork:
 
 
         # Handle nodes potentially missed by topological sort (e.g., cycles or disconnected components after initial roots)
-        if len(processed_nodes) != len(self.nodes):
-            unprocessed = set(self.nodes.keys()) - processed_nodes
-            print(f"Warning: Potential cycle or disconnected nodes detected. Processed {len(processed_nodes)}/{len(self.nodes)}. Unprocessed: {unprocessed}")
-            # Assign a large depth to unprocessed nodes or attempt recursive calc with cycle detection
+        if len(topo_order) != len(nodes):
+            unprocessed = set(nodes.keys()).difference(topo_order)
+            print(f"Warning: Potential cycle or disconnected nodes detected. Processed {len(topo_order)}/{len(nodes)}. Unprocessed: {unprocessed}")
+            # Nodes on or behind a cycle have no well-defined depth; mark them with a sentinel beyond any real depth
+            cycle_depth = len(nodes) + 1
             for node_id in unprocessed:
-                if node_id not in self.nodes: continue
-                if "depth" not in self.nodes[node_id] or self.nodes[node_id].get('_current_depth_calculation') is None:
-                     # Attempt recursive calculation with cycle detection for these nodes
-                     self.nodes[node_id].pop('_current_depth_calculation', None) # Clear any temp state
-                     visited_rec = set()
-                     calculated_depth = self._calculate_depth(node_id, visited_rec)
-                     self.nodes[node_id]["depth"] = calculated_depth
-                     self.max_depth = max(self.max_depth, calculated_depth)
-                     # Clear temp calculation state for all nodes after recursive calls
-                     for nid in self.nodes: nid_data = self.nodes.get(nid); nid_data.pop('_current_depth_calculation', None)
-
-
-        # --- Calculate other metrics in order ---
-        # 1. Counts (Direct Children, Total Descendants)
-        all_descendants_map = {nid: self.get_all_descendants(nid) for nid in self.nodes}
-        for node_id in self.nodes:
-             self.nodes[node_id]["children_count"] = len(self.get_direct_children(node_id))
-             self.nodes[node_id]["total_children"] = len(all_descendants_map.get(node_id, set()))
-
-        # 2. Profit (Depends on children's 'value')
-        for node_id in self.nodes:
-             self.nodes[node_id]["profit"] = self._calculate_profit(node_id)
-
-        # 3. Suggested Children & Needed Children (Depend on threshold and children_count)
-        for node_id in self.nodes:
-             suggested = self._calculate_suggested_child_count(node_id) # Now just threshold
-             self.nodes[node_id]["suggested_child_count"] = suggested
-             needed = max(0, suggested - self.nodes[node_id]["children_count"])
-             self.nodes[node_id]["needed_children"] = needed
-             self.nodes[node_id]["is_chokepoint"] = needed > 0 # Chokepoint if children needed
-
-        # 4. Criticality (Depends on needed_children and depth)
-        for node_id in self.nodes:
-            self.nodes[node_id]["criticality"] = self._calculate_criticality(node_id)
-
-        # 5. Balance Score - REMOVED
+                nodes[node_id]["depth"] = cycle_depth
+            depth_counts[cycle_depth] = len(unprocessed)
+            max_depth = max(max_depth, cycle_depth)
+        self.max_depth = max_depth
+        self._depth_counts = depth_counts
+
+
+        # --- Remaining metrics in a single pass per node ---
+        # Counts, profit, suggested/needed children, chokepoint flag and criticality only depend on
+        # a node's depth and its children, so one loop covers them all.
+        if len(topo_order) == len(nodes) and self._is_forest():
+            # Tree: children come before parents in reverse topological order, so descendant
+            # counts compose bottom-up in O(N)
+            # counts and profit (sum of children's values) share one walk over the children
+            for node_id in reversed(topo_order):
+                total_children = 0
+                profit = 0.0
+                for child_id in graph.get(node_id, ()):
+                    child = nodes[child_id]
+                    total_children += child["total_children"] + 1
+                    profit += child.get("value", 0.0)
+                nodes[node_id]["total_children"] = total_children
+                recompute_node_metrics(node_id, profit)
+        elif len(topo_order) == len(nodes):
+            # DAG with shared descendants: compose distinct descendant sets bottom-up from the
+            # children's sets (computed first in reverse topological order) instead of a BFS per node
+            descendant_sets: Dict[str, Set[str]] = {}
+            for node_id in reversed(topo_order):
+                descendants = set()
+                profit = 0.0
+                for child_id in graph.get(node_id, ()):
+                    if child_id in descendant_sets:
+                        descendants.add(child_id)
+                        descendants |= descendant_sets[child_id]
+                        profit += nodes[child_id].get("value", 0.0)
+                descendant_sets[node_id] = descendants
+                nodes[node_id]["total_children"] = len(descendants)
+                recompute_node_metrics(node_id, profit)
+        else:
+            # Cycles: no topological order to compose from, count distinct descendants per node
+            collect_descendants = self._collect_descendants
+            for node_id, node in nodes.items():
+                node["total_children"] = len(collect_descendants(node_id))
+                recompute_node_metrics(node_id)
+
+        # Balance Score - REMOVED
         # for node_id in self.nodes:
         #      self.nodes[node_id]["balance_score"] = self._calculate_balance_score(node_id)
+        self._metrics_dirty = False
         print("Metrics update complete.")
 
 
     # --- Persistence Methods ---
 
-    def save(self, filename: str = "network.json") -> None:
-        """Save the network state to JSON."""
+    def _backup_due(self) -> bool:
+        """Whether save() should back up the existing file: first save, every N saves, or when the last backup is old."""
+        if self._last_backup_time is None:
+            return True
+        return (self._saves_since_backup >= self.BACKUP_EVERY_N_SAVES
+                or datetime.now() - self._last_backup_time >= self.BACKUP_MAX_AGE)
+
+    def _prune_backups(self, filename: str) -> None:
+        """Deletes all but the newest BACKUP_KEEP backups of filename (timestamps in the names sort chronologically)."""
+        prefix = f"{os.path.splitext(filename)[0]}_backup_"
+        try:
+            backups = sorted(f for f in os.listdir(self.data_dir) if f.startswith(prefix) and f.endswith(".json"))
+        except OSError as e:
+            print(f"Error listing backups: {e}"); return
+        for old_backup in backups[:-self.BACKUP_KEEP]:
+            try: os.remove(os.path.join(self.data_dir, old_backup))
+            except OSError as e: print(f"Error removing old backup {old_backup}: {e}")
+
+    def save(self, filename: str = "network.json", compact: bool = True, backup: Optional[bool] = None) -> None:
+        """
+        Save the network state to JSON. compact=False pretty-prints for human inspection (larger, slower).
+        backup=None backs up the previous file periodically (see _backup_due), True always, False never.
+        """
+        os.makedirs(self.data_dir, exist_ok=True) # Importing the module must not write to disk; also recovers a deleted data/
         file_path = os.path.join(self.data_dir, filename)
         backup_path = None
-        if os.path.exists(file_path):
+        if backup is None:
+            backup = self._backup_due()
+        if backup and os.path.exists(file_path):
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
             backup_filename = f"{os.path.splitext(filename)[0]}_backup_{timestamp}.json"
             backup_path = os.path.join(self.data_dir, backup_filename)
-            try: shutil.copy2(file_path, backup_path)
+            try:
+                # Hard link keeps the current inode alive; os.replace below swaps in a new one. O(1) vs a full copy.
+                try: os.link(file_path, backup_path)
+                except OSError: shutil.copy2(file_path, backup_path) # Filesystem without hard links
+                self._saves_since_backup = 0
+                self._last_backup_time = datetime.now()
+                self._prune_backups(filename)
             except Exception as e: print(f"Error creating backup: {e}"); backup_path = None
+        else:
+            self._saves_since_backup += 1
 
         temp_file_path = file_path + ".tmp"
         try:
-            network_data = self.get_network_data()
-            with open(temp_file_path, 'w') as f:
-                json.dump(network_data, f, indent=2)
+            with open(temp_file_path, 'wb') as f:
+                if compact:
+                    self._write_compact_json(f)
+                else:
+                    f.write(json_dumps(self.get_network_data(), indent=True))
             # Atomically replace the old file with the new one
             os.replace(temp_file_path, file_path)
             print(f"Network saved successfully to {file_path}")
@@ -498,20 +716,44 @@ class BusinessNetwork:
             # if backup_path and os.path.exists(backup_path): try: shutil.copy2(backup_path, file_path); print("Restored from backup.") except Exception as r_e: print(f"FATAL: Save failed & Restore failed: {r_e}")
             raise # Re-raise the exception after cleanup attempt
 
+    def _write_compact_json(self, f) -> None:
+        """
+        Streams the same compact document as json_dumps(get_network_data()) to a binary file,
+        one node / graph entry at a time, so the whole serialized network is never held in memory.
+        """
+        self.ensure_metrics()
+        capacities = self.capacities
+        default_capacity = self.DEFAULT_EDGE_CAPACITY
+        flush_every = self.SAVE_FLUSH_EVERY_N_ENTRIES
+        settings = {"min_children_threshold": self.min_children_threshold, "max_depth": self.max_depth}
+
+        buffer = [b'{"nodes":{']
+        for i, (node_id, node) in enumerate(self.nodes.items()):
+            if i: buffer.append(b",")
+            buffer.append(json_dumps(node_id) + b":" + json_dumps(node))
+            if len(buffer) >= flush_every:
+                f.write(b"".join(buffer)); buffer.clear()
+        buffer.append(b'},"graph":{')
+        for i, (node_id, children) in enumerate(self.graph.items()):
+            if i: buffer.append(b",")
+            edges = [(child_id, capacities.get((node_id, child_id), default_capacity)) for child_id in children]
+            buffer.append(json_dumps(node_id) + b":" + json_dumps(edges))
+            if len(buffer) >= flush_every:
+                f.write(b"".join(buffer)); buffer.clear()
+        buffer.append(b'},"settings":' + json_dumps(settings) + b"}")
+        f.write(b"".join(buffer))
+
     @classmethod
     def load(cls, filename: str = "network.json") -> 'BusinessNetwork':
         """Load network state from JSON, applying defaults for missing fields."""
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(script_dir)
-        data_dir = os.path.join(project_root, "data")
-        file_path = os.path.join(data_dir, filename)
+        file_path = os.path.join(_DATA_DIR, filename)
 
         if not os.path.exists(file_path):
             print(f"Network file not found at {file_path}. Creating new network.")
             return cls() # Return a new instance with default settings
 
         try:
-            with open(file_path, 'r') as f: data = json.load(f)
+            with open(file_path, 'rb') as f: data = json_loads(f.read())
             settings = data.get("settings", {})
             # Initialize with loaded settings, providing defaults if missing
             network = cls(
@@ -519,46 +761,9 @@ class BusinessNetwork:
                 # balance_factor removed
             )
 
-            loaded_nodes = data.get("nodes", {})
-            for node_id, node_data in loaded_nodes.items():
-                # Provide defaults for all expected fields during load
-                node_data.setdefault("id", node_id)
-                node_data.setdefault("parents", [])
-                node_data.setdefault("value", cls.DEFAULT_NODE_VALUE) # Default value
-                node_data.setdefault("depth", 0); node_data.setdefault("children_count", 0)
-                node_data.setdefault("total_children", 0); node_data.setdefault("profit", 0.0)
-                node_data.setdefault("is_chokepoint", False); node_data.setdefault("suggested_child_count", network.min_children_threshold)
-                node_data.setdefault("needed_children", 0); node_data.setdefault("criticality", 0.0)
-                # node_data.setdefault("balance_score", 1.0) # Removed
-
-                # Remove obsolete fields if present from older files
-                node_data.pop("risk", None)
-                node_data.pop("ponzi_value", None)
-                node_data.pop("balance_score", None)
-
-                network.nodes[node_id] = node_data
-
-            loaded_graph = data.get("graph", {})
-            network.graph = defaultdict(list)
-            for node_id, edges in loaded_graph.items():
-                 if node_id in network.nodes: # Ensure node exists before adding edges
-                     # Validate and format edges correctly (ensure they are tuples)
-                     valid_edges = []
-                     if isinstance(edges, list):
-                         for edge in edges:
-                              if isinstance(edge, (list, tuple)) and len(edge) >= 1:
-                                  target_id = edge[0]
-                                  if target_id in network.nodes: # Ensure target node also exists
-                                       capacity = 1.0
-                                       if len(edge) > 1:
-                                            try: capacity = float(edge[1])
-                                            except (ValueError, TypeError): pass # Keep default capacity if conversion fails
-                                       valid_edges.append((str(target_id), capacity))
-                                  # else: print(f"Warning: Edge target '{target_id}' not found for source '{node_id}' during load.")
-                     network.graph[node_id] = valid_edges
-
-            # Ensure all nodes have at least an empty list in the graph dict
-            for node_id in network.nodes: network.graph.setdefault(node_id, [])
+            network.nodes = cls._build_nodes(data.get("nodes", {}), network.min_children_threshold)
+
+            network.graph, network.capacities = cls._build_graph(data.get("graph", {}), network.nodes)
 
             network._update_metrics() # Recalculate all metrics based on loaded data/settings
             print(f"Network loaded and metrics recalculated from {file_path}")
@@ -571,11 +776,74 @@ class BusinessNetwork:
             print(traceback.format_exc())
             return cls() # Return new instance on other errors
 
+    @classmethod
+    def _build_nodes(cls, loaded_nodes: Dict[str, Any], min_children: int) -> Dict[str, Dict[str, Any]]:
+        """Normalize raw node entries, skipping non-dict ones. Shared by load and from_json."""
+        # Bind loop-invariant attributes to locals once instead of per node
+        node_defaults = cls._NODE_DEFAULTS
+        nodes = dict.fromkeys(loaded_nodes) # Pre-sized; avoids incremental rehashing
+        for node_id, node_data in loaded_nodes.items():
+            if not isinstance(node_data, dict): # Skip invalid node entries
+                del nodes[node_id]
+                continue
+            nodes[node_id] = _normalize_node(node_id, node_data, node_defaults, min_children)
+        return nodes
+
+    @classmethod
+    def _build_graph(cls, loaded_graph: Dict[str, Any], nodes: Dict[str, Any]) -> Tuple[Dict[str, List[str]], Dict[Tuple[str, str], float]]:
+        """
+        Validate raw [child, capacity] adjacency data against the loaded nodes and rebuild every node's
+        'parents' from the validated edges, so parent links and edges always agree (the metrics pass uses
+        len(parents) as the in-degree). Shared by load and from_json.
+        """
+        graph = defaultdict(list)
+        capacities = {}
+        default_capacity = cls.DEFAULT_EDGE_CAPACITY
+        for node_id, edges in loaded_graph.items():
+            if node_id in nodes and isinstance(edges, list): # Ensure source exists
+                valid_edges = []
+                for edge in edges:
+                    try:
+                        target_id = edge[0]
+                    except (TypeError, IndexError, KeyError):
+                        continue # Malformed edge entry (not a non-empty list)
+                    if type(target_id) is not str: target_id = str(target_id) # JSON ids are almost always str
+                    # Ensure target exists; a bare string is indexable but not an edge
+                    if target_id in nodes and type(edge) is not str:
+                        valid_edges.append(target_id)
+                        if len(edge) > 1:
+                            capacity = cls._parse_capacity(edge[1])
+                            if capacity != default_capacity: capacities[(node_id, target_id)] = capacity
+                if len(valid_edges) != len(set(valid_edges)):
+                    valid_edges = list(dict.fromkeys(valid_edges)) # Drop duplicate edges, keeping order
+                graph[node_id] = valid_edges
+
+        incoming: Dict[str, List[str]] = {} # child -> sources of its validated edges
+        for node_id, children in graph.items():
+            for child_id in children:
+                incoming.setdefault(child_id, []).append(node_id)
+
+        for node_id, node in nodes.items():
+            graph.setdefault(node_id, []) # Ensure all nodes have at least an empty list in the graph dict
+            sources = incoming.get(node_id)
+            if not sources:
+                node["parents"] = [] # Always a list (default is a tuple); links without an edge are dropped
+                continue
+            # Keep the stored parent order where it matches an edge, then add edge sources it did not list
+            listed = node["parents"] if isinstance(node["parents"], list) else []
+            parents = []
+            for parent_id in listed:
+                if parent_id in sources and parent_id not in parents: parents.append(parent_id)
+            if len(parents) != len(sources):
+                parents.extend(p for p in sources if p not in parents)
+            node["parents"] = parents
+        return graph, capacities
+
     @classmethod
     def from_json(cls, json_data: Union[str, bytes]) -> 'BusinessNetwork':
         """Create network from JSON string/bytes (used for import), applying defaults."""
         try:
-            data = json.loads(json_data)
+            data = json_loads(json_data)
             if not isinstance(data.get("nodes"), dict) or not isinstance(data.get("graph"), dict):
                  raise ValueError("Invalid JSON structure: Missing 'nodes' or 'graph'.")
 
@@ -585,52 +853,12 @@ class BusinessNetwork:
                 # balance_factor removed
             )
 
-            loaded_nodes = data.get("nodes", {})
-            for node_id, node_data in loaded_nodes.items():
-                if not isinstance(node_data, dict): continue # Skip invalid node entries
-                # Set defaults for required/calculated fields
-                node_data.setdefault("id", node_id)
-                node_data.setdefault("parents", [])
-                node_data.setdefault("value", cls.DEFAULT_NODE_VALUE) # Default value
-                node_data.setdefault("depth", 0); node_data.setdefault("children_count", 0); node_data.setdefault("total_children", 0); node_data.setdefault("profit", 0.0)
-                node_data.setdefault("is_chokepoint", False); node_data.setdefault("suggested_child_count", network.min_children_threshold); node_data.setdefault("needed_children", 0)
-                node_data.setdefault("criticality", 0.0)
-                # node_data.setdefault("balance_score", 1.0) # Removed
-
-                 # Remove obsolete fields
-                node_data.pop("risk", None)
-                node_data.pop("ponzi_value", None)
-                node_data.pop("balance_score", None)
-
-                # Validate value format if present
-                try:
-                     if "value" in node_data: node_data["value"] = float(node_data["value"])
-                except (ValueError, TypeError):
-                     print(f"Warning: Invalid value format for node '{node_id}'. Using default.")
-                     node_data["value"] = cls.DEFAULT_NODE_VALUE
-
-                network.nodes[node_id] = node_data
-
-            loaded_graph = data.get("graph", {})
-            network.graph = defaultdict(list)
-            for node_id, edges in loaded_graph.items():
-                if node_id in network.nodes and isinstance(edges, list): # Ensure source exists
-                    valid_edges = []
-                    for edge in edges:
-                         if isinstance(edge, (list, tuple)) and len(edge) >= 1:
-                             target_id = str(edge[0])
-                             if target_id in network.nodes: # Ensure target exists
-                                 capacity = 1.0
-                                 if len(edge) > 1:
-                                     try: capacity = float(edge[1])
-                                     except (ValueError, TypeError): pass
-                                 valid_edges.append( (target_id, capacity) )
-                    network.graph[node_id] = valid_edges
-
-            # Ensure all nodes have graph entries
-            for node_id in network.nodes: network.graph.setdefault(node_id, [])
-
-            network._update_metrics() # Recalculate all metrics
+            network.nodes = cls._build_nodes(data.get("nodes", {}), network.min_children_threshold)
+
+            network.graph, network.capacities = cls._build_graph(data.get("graph", {}), network.nodes)
+
+            # Defer the metrics pass until something reads them; validation-only callers never pay for it
+            network._metrics_dirty = True
             return network
         except json.JSONDecodeError as json_err:
              raise ValueError(f"Invalid JSON data provided: {json_err}") from json_err